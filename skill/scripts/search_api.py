@@ -2,78 +2,361 @@
 """
 LemonData API Search Script
 
-Automatically fetches the latest model list from LemonData API and searches.
+Fetches the model list from LemonData API (cached locally, see CACHE_DIR) and searches.
 Extracts model name, category, pricing, and description.
 """
 
+import hashlib
+import os
 import re
 import sys
 import json
-from typing import List, Dict, Optional
+import time
+import threading
+from collections import defaultdict
+from enum import IntEnum
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, List, Dict, Optional, Tuple, Union
 
 try:
-    import requests
+    import orjson
 except ImportError:
-    print("Please install the requests library: pip install requests")
-    sys.exit(1)
+    orjson = None
 
 # LemonData API endpoints
 MODELS_API_URL = "https://api.lemondata.cc/v1/models"
 PRICING_API_URL = "https://api.lemondata.cc/v1/pricing"
 
+# Local cache: serve fresh entries directly, serve stale entries while
+# refreshing in the background, and block on the network past the stale window
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "lemondata")
+CACHE_FRESH_SECONDS = 3600
+CACHE_STALE_SECONDS = 86400
+
+# Request timeouts; background refreshes use a short one so a stale-cache run
+# with the network down does not keep the CLI alive after printing results
+REQUEST_TIMEOUT_SECONDS = 30
+REFRESH_TIMEOUT_SECONDS = 5
+
+# Maximum number of search results printed by the CLI
+DISPLAY_LIMIT = 20
+
+
+class Category(IntEnum):
+    """Model category code, used to index the label and endpoint tables."""
+    CHAT = 0
+    IMAGE = 1
+    VIDEO = 2
+    MUSIC = 3
+    MODEL_3D = 4
+    AUDIO = 5
+    EMBEDDINGS = 6
+    RERANK = 7
+
+
+# Display label per category, indexed by Category. Interned so the
+# grouping/endpoint dicts keyed by label can match on identity
+_CATEGORY_LABELS = tuple(sys.intern(label) for label in (
+    "💬 Chat Completion",
+    "🎨 Image Generation",
+    "🎬 Video Generation",
+    "🎵 Music Generation",
+    "🗿 3D Models",
+    "🎤 Audio Processing",
+    "📊 Embeddings",
+    "🔄 Rerank",
+))
+
+# API endpoint per category, indexed by Category
+_CATEGORY_ENDPOINTS = (
+    "/v1/chat/completions",
+    "/v1/images/generations",
+    "/v1/video/generations",
+    "/v1/music/generations",
+    "/v1/3d/generations",
+    "/v1/audio/speech or /v1/audio/transcriptions",
+    "/v1/embeddings",
+    "/v1/rerank",
+)
+
+_LABEL_TO_CATEGORY = {label: Category(i) for i, label in enumerate(_CATEGORY_LABELS)}
+
+# Category keywords, in priority order (the first matching category wins)
+_VIDEO_KEYWORDS = ("sora", "runway", "kling", "luma", "pika", "video")
+_MUSIC_KEYWORDS = ("suno", "music", "udio")
+_3D_KEYWORDS = ("tripo", "3d", "mesh")
+_IMAGE_KEYWORDS = ("midjourney", "flux", "sd", "stable", "imagen", "ideogram", "kling-image")
+_AUDIO_KEYWORDS = ("tts", "whisper", "speech", "audio")
+_EMBEDDING_KEYWORDS = ("embedding", "embed")
+_RERANK_KEYWORDS = ("rerank",)
+
+
+def _keyword_pattern(keywords: Tuple[str, ...]) -> "re.Pattern[str]":
+    """Compile keywords into a single regex alternation."""
+    return re.compile("|".join(re.escape(keyword) for keyword in keywords))
+
+
+# Per-category patterns, checked in priority order
+_CATEGORY_PATTERNS = (
+    (_keyword_pattern(_VIDEO_KEYWORDS), Category.VIDEO),
+    (_keyword_pattern(_MUSIC_KEYWORDS), Category.MUSIC),
+    (_keyword_pattern(_3D_KEYWORDS), Category.MODEL_3D),
+    (_keyword_pattern(_IMAGE_KEYWORDS), Category.IMAGE),
+    (_keyword_pattern(_AUDIO_KEYWORDS), Category.AUDIO),
+    (_keyword_pattern(_EMBEDDING_KEYWORDS), Category.EMBEDDINGS),
+    (_keyword_pattern(_RERANK_KEYWORDS), Category.RERANK),
+)
+
+# Matches any non-chat keyword in one pass, so chat models skip the per-category checks
+_ANY_CATEGORY_KEYWORD = _keyword_pattern(
+    _VIDEO_KEYWORDS + _MUSIC_KEYWORDS + _3D_KEYWORDS + _IMAGE_KEYWORDS
+    + _AUDIO_KEYWORDS + _EMBEDDING_KEYWORDS + _RERANK_KEYWORDS
+)
+
+# Shared fallback for models without pricing (never mutated)
+_NO_PRICING: Dict = {}
+
+
+# Shared session so both endpoints reuse one pooled keep-alive TLS connection;
+# created on first network use so cached runs never import requests
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+class _FetchError(Exception):
+    """Raised when an API request fails."""
+
+
+def _get_session():
+    """
+    Return the shared requests session, importing requests on first use.
+
+    Returns:
+        requests.Session instance
 
-def fetch_models(api_key: Optional[str] = None) -> List[Dict]:
+    Raises:
+        _FetchError: If requests is not installed
     """
-    Fetch the latest model list from LemonData.
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            try:
+                import requests
+                from requests.adapters import HTTPAdapter
+            except ImportError:
+                raise _FetchError("Please install the requests library: pip install requests")
+
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+            _SESSION = session
+    return _SESSION
+
+
+def _loads(data: bytes) -> Any:
+    """
+    Decode JSON, using orjson when it is installed.
 
     Args:
-        api_key: LemonData API Key (optional, some endpoints may require it)
+        data: Raw JSON bytes
 
     Returns:
-        List of models
+        Decoded JSON value
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _read_cache(name: str) -> Optional[Dict]:
+    """
+    Read a cache entry.
+
+    Args:
+        name: Cache entry name
+
+    Returns:
+        Entry {"fetched_at": timestamp, "data": payload}, or None if missing/unreadable
+    """
+    try:
+        with open(os.path.join(CACHE_DIR, f"{name}.json"), "rb") as f:
+            entry = _loads(f.read())
+        return {"fetched_at": float(entry["fetched_at"]), "data": entry["data"]}
+    except (OSError, ValueError, TypeError, KeyError):
+        return None
+
+
+def _write_cache(name: str, data: Any) -> None:
+    """
+    Write a cache entry atomically. Failures are ignored (the cache is best-effort).
+
+    Args:
+        name: Cache entry name
+        data: Payload to store
+    """
+    path = os.path.join(CACHE_DIR, f"{name}.json")
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"fetched_at": time.time(), "data": data}, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _cache_name(name: str, api_key: Optional[str]) -> str:
+    """
+    Build a cache entry name scoped to the API key.
+
+    Args:
+        name: Base entry name
+        api_key: LemonData API Key
+
+    Returns:
+        Entry name (keyed responses never share an entry with other keys)
+    """
+    if not api_key:
+        return name
+    return f"{name}-{hashlib.sha256(api_key.encode()).hexdigest()[:16]}"
+
+
+def _refresh_cache(name: str, fetch: Callable[[float], Any]) -> None:
+    """
+    Refetch and store a cache entry, ignoring network errors.
+
+    Args:
+        name: Cache entry name
+        fetch: Function fetching the payload from the API, given a timeout
+    """
+    try:
+        _write_cache(name, fetch(REFRESH_TIMEOUT_SECONDS))
+    except _FetchError:
+        pass
+
+
+def _cached_fetch(name: str, fetch: Callable[[float], Any], refresh: bool = False) -> Any:
+    """
+    Fetch a payload with stale-while-revalidate caching.
+
+    Args:
+        name: Cache entry name
+        fetch: Function fetching the payload from the API, given a timeout
+        refresh: Skip fresh/stale cache hits and fetch from the API
+
+    Returns:
+        Cached or freshly fetched payload
 
     Raises:
-        Exception: If request fails
+        _FetchError: If the fetch fails and no cached payload exists
+    """
+    entry = _read_cache(name)
+    if entry is not None and not refresh:
+        age = time.time() - entry["fetched_at"]
+        if 0 <= age < CACHE_FRESH_SECONDS:
+            return entry["data"]
+        if 0 <= age < CACHE_STALE_SECONDS:
+            # Non-daemon so the refresh can finish writing before the interpreter
+            # exits; it uses the short refresh timeout to bound that wait
+            threading.Thread(target=_refresh_cache, args=(name, fetch)).start()
+            return entry["data"]
+
+    try:
+        data = fetch(REQUEST_TIMEOUT_SECONDS)
+    except _FetchError:
+        # An outdated catalog beats no catalog when the API is unreachable
+        if entry is not None:
+            return entry["data"]
+        raise
+    _write_cache(name, data)
+    return data
+
+
+def _fetch_json(
+    url: str,
+    api_key: Optional[str] = None,
+    timeout: float = REQUEST_TIMEOUT_SECONDS
+) -> Dict:
+    """
+    GET an API endpoint and decode the JSON body.
+
+    Args:
+        url: Endpoint URL
+        api_key: LemonData API Key
+        timeout: Request timeout in seconds
+
+    Returns:
+        Decoded JSON response
+
+    Raises:
+        _FetchError: If request fails
     """
     headers = {}
     if api_key:
         headers["Authorization"] = f"Bearer {api_key}"
 
+    session = _get_session()
+    import requests
     try:
-        response = requests.get(MODELS_API_URL, headers=headers, timeout=30)
+        response = session.get(url, headers=headers, timeout=timeout)
         response.raise_for_status()
-        data = response.json()
-        return data.get("data", [])
-    except requests.exceptions.RequestException as e:
+        # Non-JSON bodies (e.g. an HTML error page) count as a failed request
+        return _loads(response.content)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        raise _FetchError(e) from e
+
+
+def fetch_models(api_key: Optional[str] = None, refresh: bool = False) -> List[Dict]:
+    """
+    Fetch the latest model list from LemonData.
+
+    Args:
+        api_key: LemonData API Key (optional, some endpoints may require it)
+        refresh: Bypass the local cache and fetch from the API
+
+    Returns:
+        List of models
+
+    Raises:
+        Exception: If request fails
+    """
+    def fetch(timeout: float) -> List[Dict]:
+        return _fetch_json(MODELS_API_URL, api_key, timeout).get("data", [])
+
+    try:
+        return _cached_fetch(_cache_name("models", api_key), fetch, refresh=refresh)
+    except _FetchError as e:
         raise Exception(f"Failed to fetch model list: {e}")
 
 
-def fetch_pricing(api_key: Optional[str] = None) -> Dict[str, Dict]:
+def fetch_pricing(api_key: Optional[str] = None, refresh: bool = False) -> Dict[str, Dict]:
     """
     Fetch model pricing information.
 
     Args:
         api_key: LemonData API Key
+        refresh: Bypass the local cache and fetch from the API
 
     Returns:
         Model pricing dictionary {model_id: pricing_info}
     """
-    headers = {}
-    if api_key:
-        headers["Authorization"] = f"Bearer {api_key}"
-
-    try:
-        response = requests.get(PRICING_API_URL, headers=headers, timeout=30)
-        response.raise_for_status()
-        data = response.json()
+    def fetch(timeout: float) -> Dict[str, Dict]:
         pricing = {}
-        for item in data.get("data", []):
+        for item in _fetch_json(PRICING_API_URL, api_key, timeout).get("data", []):
             pricing[item["model"]] = item.get("pricing", {})
         return pricing
-    except requests.exceptions.RequestException:
+
+    try:
+        return _cached_fetch(_cache_name("pricing", api_key), fetch, refresh=refresh)
+    except _FetchError:
         return {}
 
 
+@lru_cache(maxsize=4096)
 def get_model_category(model_id: str, owned_by: str) -> str:
     """
     Infer category based on model ID and provider.
@@ -85,38 +368,29 @@ def get_model_category(model_id: str, owned_by: str) -> str:
     Returns:
         Model category
     """
-    model_lower = model_id.lower()
-
-    # Video generation
-    if any(x in model_lower for x in ["sora", "runway", "kling", "luma", "pika", "video"]):
-        return "🎬 Video Generation"
+    return _CATEGORY_LABELS[_categorize(model_id.lower())]
 
-    # Music generation
-    if any(x in model_lower for x in ["suno", "music", "udio"]):
-        return "🎵 Music Generation"
 
-    # 3D models
-    if any(x in model_lower for x in ["tripo", "3d", "mesh"]):
-        return "🗿 3D Models"
-
-    # Image generation
-    if any(x in model_lower for x in ["midjourney", "flux", "sd", "stable", "imagen", "ideogram", "kling-image"]):
-        return "🎨 Image Generation"
+def _categorize(model_lower: str) -> Category:
+    """
+    Infer category code from an already lowercased model ID.
 
-    # Audio
-    if any(x in model_lower for x in ["tts", "whisper", "speech", "audio"]):
-        return "🎤 Audio Processing"
+    Args:
+        model_lower: Lowercased model ID
 
-    # Embeddings
-    if any(x in model_lower for x in ["embedding", "embed"]):
-        return "📊 Embeddings"
+    Returns:
+        Model category code
+    """
+    # Most models are chat models: rule them out with a single scan
+    if not _ANY_CATEGORY_KEYWORD.search(model_lower):
+        return Category.CHAT
 
-    # Rerank
-    if "rerank" in model_lower:
-        return "🔄 Rerank"
+    for pattern, category in _CATEGORY_PATTERNS:
+        if pattern.search(model_lower):
+            return category
 
     # Default to chat models
-    return "💬 Chat Completion"
+    return Category.CHAT
 
 
 def enrich_models(models: List[Dict], pricing: Dict[str, Dict]) -> List[Dict]:
@@ -131,58 +405,98 @@ def enrich_models(models: List[Dict], pricing: Dict[str, Dict]) -> List[Dict]:
         Enriched model list
     """
     enriched = []
+    append = enriched.append
+    pricing_get = pricing.get
     for model in models:
         model_id = model.get("id", "")
         owned_by = model.get("owned_by", "")
-        price_info = pricing.get(model_id, {})
+        category_code = _categorize(model_id.lower())
+        category = _CATEGORY_LABELS[category_code]
+        price_get = pricing_get(model_id, _NO_PRICING).get
 
-        enriched.append({
+        append({
             "id": model_id,
             "owned_by": owned_by,
-            "category": get_model_category(model_id, owned_by),
-            "input_price": price_info.get("input_per_1m"),
-            "output_price": price_info.get("output_per_1m"),
-            "per_request": price_info.get("per_request"),
-            "is_lock_price": price_info.get("is_lock_price", False)
+            "category": category,
+            "category_code": category_code,
+            "input_price": price_get("input_per_1m"),
+            "output_price": price_get("output_per_1m"),
+            "per_request": price_get("per_request"),
+            "is_lock_price": price_get("is_lock_price", False),
+            # Lowercased search fields, computed once instead of on every query
+            "_category_lower": category.lower(),
+            "_search_blob": _search_blob(model_id, owned_by, category)
         })
     return enriched
 
 
+def _search_blob(model_id: str, owned_by: str, category: str) -> str:
+    """Build the lowercased keyword search text; NUL keeps fields from joining."""
+    return f"{model_id}\0{owned_by}\0{category}".lower()
+
+
 def search_models(
     models: List[Dict],
     keyword: Optional[str] = None,
-    category: Optional[str] = None
+    category: Optional[str] = None,
+    limit: Optional[int] = None
 ) -> List[Dict]:
     """
     Search models.
 
     Args:
-        models: Model list
+        models: Model list (enriched models skip re-lowercasing their fields)
         keyword: Keyword (searches in model ID and provider)
         category: Category keyword
+        limit: Stop after this many matches (None means return all)
 
     Returns:
         Matching model list
     """
+    category_lower = category.lower() if category else None
+    keyword_lower = keyword.lower() if keyword else None
+
+    # Decide once whether the list carries the precomputed fields from
+    # enrich_models (lists are expected to be uniformly enriched or plain)
+    if models and "_search_blob" in models[0]:
+        def match_category(m: Dict) -> bool:
+            return category_lower in m["_category_lower"]
+
+        def match_keyword(m: Dict) -> bool:
+            return keyword_lower in m["_search_blob"]
+    else:
+        def match_category(m: Dict) -> bool:
+            return category_lower in m.get("category", "").lower()
+
+        def match_keyword(m: Dict) -> bool:
+            return keyword_lower in _search_blob(
+                m.get("id", ""), m.get("owned_by", ""), m.get("category", "")
+            )
+
+    # Chain only the filters the query uses, so the per-model check carries
+    # no "is this filter set" branches
     results = models
+    if category_lower:
+        results = filter(match_category, results)
+    if keyword_lower:
+        results = filter(match_keyword, results)
+    return list(islice(results, limit))
 
-    if category:
-        category_lower = category.lower()
-        results = [
-            m for m in results
-            if category_lower in m.get("category", "").lower()
-        ]
 
-    if keyword:
-        keyword_lower = keyword.lower()
-        results = [
-            m for m in results
-            if keyword_lower in m.get("id", "").lower() or
-               keyword_lower in m.get("owned_by", "").lower() or
-               keyword_lower in m.get("category", "").lower()
-        ]
+def _group_by_category(models: List[Dict]) -> Dict[str, List[Dict]]:
+    """
+    Group models by category in a single pass.
 
-    return results
+    Args:
+        models: Model list
+
+    Returns:
+        Category to model list mapping (models keep their original order)
+    """
+    grouped = defaultdict(list)
+    for model in models:
+        grouped[model["category"]].append(model)
+    return grouped
 
 
 def format_model_info(model: Dict, index: int = 0) -> str:
@@ -213,39 +527,37 @@ def format_model_info(model: Dict, index: int = 0) -> str:
    - Docs: https://docs.lemondata.cc/api-reference"""
 
 
-def get_api_endpoint(category: str) -> str:
+@lru_cache(maxsize=16, typed=True)
+def get_api_endpoint(category: Union[Category, str]) -> str:
     """
     Return the corresponding API endpoint based on category.
 
     Args:
-        category: Model category
+        category: Model category code, or category label
 
     Returns:
         API endpoint path
     """
-    endpoints = {
-        "💬 Chat Completion": "/v1/chat/completions",
-        "🎨 Image Generation": "/v1/images/generations",
-        "🎬 Video Generation": "/v1/video/generations",
-        "🎵 Music Generation": "/v1/music/generations",
-        "🗿 3D Models": "/v1/3d/generations",
-        "🎤 Audio Processing": "/v1/audio/speech or /v1/audio/transcriptions",
-        "📊 Embeddings": "/v1/embeddings",
-        "🔄 Rerank": "/v1/rerank"
-    }
-    return endpoints.get(category, "/v1/chat/completions")
+    if not isinstance(category, Category):
+        category = _LABEL_TO_CATEGORY.get(category, Category.CHAT)
+    return _CATEGORY_ENDPOINTS[category]
 
 
 def main():
     """
     Command line usage example.
     """
-    if len(sys.argv) > 1 and sys.argv[1] in ['-h', '--help']:
+    args = [arg for arg in sys.argv[1:] if arg != '--refresh']
+    refresh = len(args) != len(sys.argv) - 1
+
+    if args and args[0] in ['-h', '--help']:
         print("Usage:")
-        print("  python search_api.py [keyword] [category]")
+        print("  python search_api.py [--refresh] [keyword] [category]")
         print()
         print("Description:")
-        print("  Script automatically fetches the latest model list from LemonData API")
+        print("  Script fetches the model list from LemonData API and caches it in ~/.cache/lemondata.")
+        print("  Cached data is used for 1 hour, then served up to 24 hours old while refreshing")
+        print("  in the background. Use --refresh to always fetch the latest list.")
         print()
         print("Examples:")
         print("  python search_api.py                    # List all models")
@@ -253,16 +565,21 @@ def main():
         print("  python search_api.py claude             # Search for Claude models")
         print("  python search_api.py '' video           # Search for video generation models")
         print("  python search_api.py flux image         # Search for Flux in image generation")
+        print("  python search_api.py --refresh GPT      # Search GPT against the latest list")
         sys.exit(0)
 
-    keyword = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1] else None
-    category = sys.argv[2] if len(sys.argv) > 2 else None
+    keyword = args[0] if len(args) > 0 and args[0] else None
+    category = args[1] if len(args) > 1 else None
 
     # Fetch the latest model list
     print("Fetching latest model list from LemonData...")
     try:
-        models = fetch_models()
-        pricing = fetch_pricing()
+        # Fetch both endpoints concurrently so startup waits on the slower one
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            models_future = executor.submit(fetch_models, refresh=refresh)
+            pricing_future = executor.submit(fetch_pricing, refresh=refresh)
+            models = models_future.result()
+            pricing = pricing_future.result()
         models = enrich_models(models, pricing)
         print(f"✓ Success, found {len(models)} models")
         print()
@@ -272,40 +589,40 @@ def main():
 
     # Search
     if keyword or category:
-        results = search_models(models, keyword, category)
-        print(f"Search results: {len(results)} matching models")
+        # Fetch one extra match to know whether the list was truncated
+        results = search_models(models, keyword, category, limit=DISPLAY_LIMIT + 1)
+        truncated = len(results) > DISPLAY_LIMIT
+        results = results[:DISPLAY_LIMIT]
+        count = f"{DISPLAY_LIMIT}+" if truncated else str(len(results))
+        print(f"Search results: {count} matching models")
         print()
 
         if len(results) == 0:
             print("No matching models found, try different keywords")
             print()
             print("Available categories:")
-            categories = set(m["category"] for m in models)
+            categories = _group_by_category(models)
             for cat in sorted(categories):
-                count = len([m for m in models if m["category"] == cat])
-                print(f"  - {cat} ({count} models)")
+                print(f"  - {cat} ({len(categories[cat])} models)")
             sys.exit(0)
 
-        for i, model in enumerate(results[:20], 1):
-            print(format_model_info(model, i))
-            print(f"   - API Endpoint: {get_api_endpoint(model['category'])}")
-            print()
+        # Build all result blocks first and write them with a single call
+        sys.stdout.write("".join(
+            f"{format_model_info(model, i)}\n"
+            f"   - API Endpoint: {get_api_endpoint(model['category_code'])}\n\n"
+            for i, model in enumerate(results, 1)
+        ))
 
-        if len(results) > 20:
-            print(f"... {len(results) - 20} more models not shown")
+        if truncated:
+            print("... more models not shown")
             print("Use more specific keywords to filter")
     else:
         # Show category statistics
         print("Model category statistics:")
         print()
-        categories = {}
-        for m in models:
-            cat = m["category"]
-            if cat not in categories:
-                categories[cat] = []
-            categories[cat].append(m)
-
-        for cat in sorted(categories.keys()):
+        categories = _group_by_category(models)
+
+        for cat in sorted(categories):
             model_list = categories[cat]
             print(f"{cat} ({len(model_list)} models)")
             # Show first 5 examples
@@ -315,7 +632,7 @@ def main():
                 print(f"  ... {len(model_list) - 5} more")
             print()
 
-        print(f"API Endpoint: {get_api_endpoint('💬 Chat Completion')}")
+        print(f"API Endpoint: {get_api_endpoint(Category.CHAT)}")
         print()
         print("Search for specific models using keywords, e.g.:")
         print("  python search_api.py GPT")